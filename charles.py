@@ -1,6 +1,11 @@
 from random import choice, random, shuffle
 from operator import attrgetter
 from copy import copy
+from collections import deque, namedtuple
+import heapq
+import json
+import numpy as np
+from selection import crowded_tournament_sel
 
 # Defining Individual (representation + fitness):
 class Individual:
@@ -28,6 +33,8 @@ class Individual:
             self.representation = representation
         # Calculate fitness for the individual
         self.fitness = self.get_fitness()
+        # Fitness sharing changes 'fitness' in place, the hall of fame and run history use this unshared value
+        self.raw_fitness = self.fitness
 
     def generate_routes(self, route_size, number_routes, valid_set, fuel_cities, distance_matrix):
         """
@@ -107,13 +114,267 @@ class Individual:
         return f"Representation: {self.representation}; Fitness: {self.fitness}"
 
 
+# Hall of fame
+class HallOfFame:
+    """
+    Keeps the k best unique genomes seen during a run, with their fitness and generation.
+
+    Stored as a heap whose root is the worst kept entry, so memory stays bounded by k
+    and most candidates are rejected with a single comparison.
+
+    Attributes:
+        k (int): The maximum number of entries.
+        optim (str): The optimization type ('max' or 'min').
+    """
+    def __init__(self, k, optim):
+        """
+        Initializes a HallOfFame object.
+
+        Args:
+            k (int): The maximum number of entries.
+            optim (str): The optimization type ('max' or 'min').
+        """
+        if k < 1:
+            raise ValueError('The hall of fame needs room for at least one entry.')
+        self.k = k
+        self.optim = optim
+        self._heap = [] # (priority, insertion order, genome key, fitness, generation)
+        self._keys = set() # Genome keys in the heap, to keep entries unique
+        self._counter = 0
+
+    def update(self, individuals, generation):
+        """
+        Offers a generation of individuals to the hall of fame.
+
+        Args:
+            individuals (iterable): The individuals of the generation, ranked by their unshared 'raw_fitness'.
+            generation (int): The generation number.
+
+        Returns:
+            int: The number of new entries.
+        """
+        added = 0
+        for individual in individuals:
+            # Higher priority is better, so 'min' fitness is negated
+            priority = individual.raw_fitness if self.optim == 'max' else -individual.raw_fitness
+            if len(self._heap) == self.k and priority <= self._heap[0][0]:
+                continue # Not better than the worst entry
+            key = tuple(tuple(route) for route in individual.representation)
+            if key in self._keys:
+                continue
+            # The key is an immutable copy of the routes, so it is the only copy of the genome that is kept
+            entry = (priority, self._counter, key, individual.raw_fitness, generation)
+            self._counter += 1
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            else:
+                self._keys.discard(heapq.heapreplace(self._heap, entry)[2])
+            self._keys.add(key)
+            added += 1
+        return added
+
+    def entries(self):
+        """
+        Returns the entries from best to worst.
+
+        Returns:
+            list: List of (fitness, generation, representation) tuples.
+        """
+        return [(fitness, generation, [list(route) for route in key])
+                for _, _, key, fitness, generation in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+    def best(self): # Returns the best (fitness, generation, representation) entry.
+        if not self._heap:
+            raise IndexError('The hall of fame is empty.')
+        return self.entries()[0]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return iter(self.entries())
+
+
+# Run history
+def _plain_number(value): # Converts NumPy scalars, also inside tuples, to plain Python numbers.
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return tuple(_plain_number(v) for v in value)
+    return value.item() if hasattr(value, 'item') else value
+
+GenerationStats = namedtuple('GenerationStats', ['generation', 'best', 'mean', 'worst'])
+
+class RunHistory:
+    """
+    Stores per-generation statistics in constant memory.
+
+    The last 'capacity' generations are kept in a ring buffer. If a path is given,
+    every generation is also appended to that file as one JSON line, so the full
+    history can be read back after the run without keeping it in memory.
+    The file is emptied when the RunHistory is created, so it only ever holds one run.
+
+    Attributes:
+        capacity (int): The number of generations kept in memory.
+        path (str): The file of the append log, or None.
+    """
+    def __init__(self, capacity=1000, path=None):
+        """
+        Initializes a RunHistory object.
+
+        Args:
+            capacity (int, optional): The number of generations kept in memory. Defaults to 1000.
+            path (str, optional): The file of the append log, overwritten if it exists. Defaults to None (no log).
+        """
+        self.capacity = capacity
+        self.path = path
+        self._buffer = deque(maxlen=capacity)
+        if path is not None:
+            # Start from an empty log, otherwise read_log() would mix this run with earlier ones
+            open(path, 'w').close()
+
+    def record(self, generation, best, mean, worst):
+        """
+        Records the statistics of a generation.
+
+        Args:
+            generation (int): The generation number.
+            best, mean, worst (float or tuple): The fitness statistics (one value per objective in multi-objective mode).
+        """
+        # NumPy scalars (e.g. fitness summed from a NumPy distance matrix) are not JSON serializable
+        stats = GenerationStats(int(generation), _plain_number(best), _plain_number(mean), _plain_number(worst))
+        self._buffer.append(stats)
+        if self.path is not None:
+            with open(self.path, 'a') as log:
+                log.write(json.dumps(stats._asdict()) + '\n')
+
+    def records(self): # Returns the generations kept in memory, oldest first.
+        return list(self._buffer)
+
+    def read_log(self):
+        """
+        Reads the full history back from the append log.
+
+        Yields:
+            GenerationStats: The statistics of every logged generation, oldest first.
+        """
+        if self.path is None:
+            raise ValueError('This run history has no append log.')
+        with open(self.path) as log:
+            for line in log:
+                fields = json.loads(line)
+                # JSON turns tuples into lists, turn them back
+                yield GenerationStats(**{name: tuple(value) if isinstance(value, list) else value for name, value in fields.items()})
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __iter__(self):
+        return iter(self._buffer)
+
+
+# Multi-objective helpers (NSGA-II)
+'''
+In multi-objective mode the fitness of an individual is a vector (tuple) with one value per objective,
+e.g. (total distance, number of refuel stops, route-length imbalance).
+All objectives are converted to minimization before sorting, so 'max' objectives are negated.
+'''
+def objective_matrix(individuals, optim):
+    """
+    Builds the (individuals x objectives) matrix used for non-dominated sorting.
+
+    Args:
+        individuals (list): List of Individual objects with vector fitness.
+        optim (list): The optimization type of each objective ('max' or 'min').
+
+    Returns:
+        numpy.ndarray: Float matrix where every objective is to be minimized.
+    """
+    objectives = np.asarray([individual.fitness for individual in individuals], dtype=float).reshape(len(individuals), -1)
+    if objectives.shape[1] != len(optim):
+        raise ValueError(f"Fitness has {objectives.shape[1]} objectives but optim has {len(optim)}.")
+    signs = np.array([-1.0 if o == 'max' else 1.0 for o in optim])
+    return objectives * signs
+
+
+def fast_non_dominated_sort(objectives):
+    """
+    Fast non-dominated sorting (NSGA-II) of a set of objective vectors.
+
+    The domination matrix is built in place one objective at a time, with at most two P x P
+    boolean arrays alive at once, and every front is peeled off with vectorized NumPy operations
+    instead of Python loops.
+
+    Args:
+        objectives (numpy.ndarray): (P x M) matrix, every objective to be minimized.
+
+    Returns:
+        numpy.ndarray: Front index of every point (0 is the non-dominated front).
+    """
+    size = len(objectives)
+    no_worse = np.ones((size, size), dtype=bool) # no_worse[i, j]: i is <= j on every objective
+    tmp = np.empty((size, size), dtype=bool) # Reused buffer for the comparisons
+    for column in objectives.T:
+        np.less_equal(column[:, None], column[None, :], out=tmp)
+        no_worse &= tmp
+    # i dominates j when i is no worse than j and j is not no worse than i (i is better somewhere)
+    np.logical_not(no_worse.T, out=tmp)
+    no_worse &= tmp
+    dominates = no_worse # dominates[i, j]: i dominates j
+    del tmp
+
+    # Number of points dominating each point
+    domination_count = dominates.sum(axis=0)
+    ranks = np.full(size, -1, dtype=int)
+    front = np.flatnonzero(domination_count == 0)
+    rank = 0
+    while front.size:
+        ranks[front] = rank
+        # Removing the current front releases the points it dominated
+        domination_count -= dominates[front].sum(axis=0)
+        domination_count[front] = -1 # Never select an already ranked point again
+        front = np.flatnonzero(domination_count == 0)
+        rank += 1
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    """
+    Crowding distance of every point within its own front.
+
+    Args:
+        objectives (numpy.ndarray): (P x M) matrix, every objective to be minimized.
+        ranks (numpy.ndarray): Front index of every point, as returned by fast_non_dominated_sort.
+
+    Returns:
+        numpy.ndarray: Crowding distance of every point (boundary points get infinity).
+    """
+    distances = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        if members.size <= 2:
+            distances[members] = np.inf
+            continue
+        front = objectives[members]
+        order = np.argsort(front, axis=0, kind='stable') # Sorted positions per objective
+        sorted_front = np.take_along_axis(front, order, axis=0)
+        span = sorted_front[-1] - sorted_front[0]
+        span[span == 0] = 1.0 # Objective is constant on this front, avoid dividing by zero
+        # Normalized distance between the two neighbours of each interior point
+        gaps = np.zeros_like(front)
+        gaps[1:-1] = (sorted_front[2:] - sorted_front[:-2]) / span
+        gaps[0] = gaps[-1] = np.inf
+        front_distances = np.zeros_like(front)
+        np.put_along_axis(front_distances, order, gaps, axis=0)
+        distances[members] = front_distances.sum(axis=1)
+    return distances
+
+
 class Population:
     """
     Represents a population of individuals.
 
     Attributes:
         size (int): The size of the population.
-        optim (str): The optimization type ('max' or 'min').
+        optim (str or list): The optimization type ('max' or 'min'), or one per objective for multi-objective mode.
         individuals (list): List of Individual objects representing the population.
     """
     def __init__(self, size, optim, **kwargs):
@@ -122,7 +383,9 @@ class Population:
 
         Args:
             size (int): The size of the population.
-            optim (str): The optimization type ('max' or 'min').
+            optim (str or list): The optimization type ('max' or 'min'). A list such as ['min', 'min', 'min']
+                switches to multi-objective mode, where get_fitness returns one value per objective
+                and selection.crowded_tournament_sel must be used as the selection function.
             **kwargs: Additional keyword arguments.
         """
         # Initialize Population attributes
@@ -138,8 +401,49 @@ class Population:
                 distance_matrix=kwargs["distance_matrix"] # Distance matrix between cities
             ) for _ in range(size) # Create 'size' number of individuals
         ]
+        # In multi-objective mode every individual needs a rank and crowding distance for selection
+        if self.multi_objective:
+            self.assign_rank_crowding(self.individuals)
+
+    @property
+    def multi_objective(self): # True when optim holds one optimization type per objective.
+        return not isinstance(self.optim, str)
+
+    def assign_rank_crowding(self, individuals):
+        """
+        Sets the 'rank' and 'crowding' attributes of the individuals (NSGA-II).
+
+        Args:
+            individuals (list): List of Individual objects with vector fitness.
 
-    def evolve(self, gens, xo_prob, mut_prob, select, xo, mutate, elitism, fitness_sharing):
+        Returns:
+            numpy.ndarray: The front index of every individual.
+        """
+        objectives = objective_matrix(individuals, self.optim)
+        ranks = fast_non_dominated_sort(objectives)
+        distances = crowding_distance(objectives, ranks)
+        for individual, rank, distance in zip(individuals, ranks, distances):
+            individual.rank = int(rank)
+            individual.crowding = float(distance)
+        return ranks
+
+    def nsga2_survival(self, individuals):
+        """
+        Keeps the best 'size' individuals by front, breaking ties in the last front by crowding distance.
+
+        Args:
+            individuals (list): Parents and offspring together.
+
+        Returns:
+            list: The surviving individuals.
+        """
+        ranks = self.assign_rank_crowding(individuals)
+        crowding = np.array([individual.crowding for individual in individuals])
+        # Sort by rank first, then by decreasing crowding distance
+        order = np.lexsort((-crowding, ranks))[:self.size]
+        return [individuals[i] for i in order]
+
+    def evolve(self, gens, xo_prob, mut_prob, select, xo, mutate, elitism, fitness_sharing, hall_of_fame=None, history=None):
         """
         Evolves the population over a specified number of generations.
 
@@ -150,21 +454,35 @@ class Population:
             select (function): The selection function.
             xo (function): The crossover function.
             mutate (function): The mutation function.
-            elitism (bool): Whether to use elitism.
-            fitness_sharing (bool): Whether to use fitness sharing.
+            elitism (bool): Whether to use elitism. Ignored in multi-objective mode, which always keeps the best fronts.
+            fitness_sharing (bool): Whether to use fitness sharing. Ignored in multi-objective mode (crowding distance is used instead).
+            hall_of_fame (HallOfFame, optional): Updated with every generation, query it after the run.
+                Not supported in multi-objective mode, where the first front is always kept. Defaults to None.
+            history (RunHistory, optional): Receives the best, mean and worst fitness of every generation. Defaults to None.
 
         Returns:
             list: List of fitness scores for the best individual in each generation.
+                In multi-objective mode, the best value of each objective in each generation.
         """
+        # Scalar selection functions do not understand vector fitness (tournament_sel would return None)
+        if self.multi_objective and select is not crowded_tournament_sel:
+            raise ValueError('Multi-objective mode requires selection.crowded_tournament_sel as the selection function.')
+        if hall_of_fame is not None and self.multi_objective:
+            raise ValueError('A hall of fame needs a scalar fitness, it cannot be used in multi-objective mode.')
+
         # Initialize an empty list to store fitness values of the best individuals in each generation
         fitnesses = []
 
+        # Offer the initial population too, its best individual can be lost when elitism is off
+        if hall_of_fame is not None:
+            hall_of_fame.update(self.individuals, 0)
+
         # Loop through generations
         for gen in range(gens):
             new_population = [] # Initialize an empty list for the new population of individuals
 
             # If elitism is enabled, select the best individual from the current population
-            if elitism:
+            if elitism and not self.multi_objective:
                 elite = max(self.individuals, key=attrgetter('fitness')) if self.optim == 'max' else min(self.individuals, key=attrgetter('fitness'))
 
              # Populate the new population until it reaches the desired size
@@ -189,6 +507,20 @@ class Population:
                 if len(new_population) < self.size:
                     new_population.append(Individual(representation=offspring2))
 
+            # Multi-objective mode: parents and offspring compete for survival by front and crowding distance
+            if self.multi_objective:
+                self.individuals = self.nsga2_survival(self.individuals + new_population)
+                first_front = objective_matrix([individual for individual in self if individual.rank == 0], self.optim)
+                signs = np.array([-1.0 if o == 'max' else 1.0 for o in self.optim])
+                best_objectives = tuple((first_front.min(axis=0) * signs).tolist())
+                print(f"Gen #{gen + 1}: first front of {len(first_front)} individuals, best objectives: {best_objectives}")
+                fitnesses.append(best_objectives)
+                if history is not None:
+                    objectives = objective_matrix(self.individuals, self.optim) * signs
+                    worst_objectives = np.where(signs < 0, objectives.min(axis=0), objectives.max(axis=0))
+                    history.record(gen + 1, best_objectives, tuple(objectives.mean(axis=0).tolist()), tuple(worst_objectives.tolist()))
+                continue
+
             # Apply elitism if enabled
             if elitism:
                 # Find the worst individual in the new population
@@ -208,6 +540,15 @@ class Population:
             # Append the fitness of the best individual to the list of fitnesses
             fitnesses.append(best_individual.fitness)
 
+            # Keep the best solutions and the generation statistics, using the unshared fitness
+            # (an elite carried over from the previous generation may already hold a shared fitness)
+            if hall_of_fame is not None:
+                hall_of_fame.update(self.individuals, gen + 1)
+            if history is not None:
+                raw_fitnesses = [individual.raw_fitness for individual in self]
+                best_raw, worst_raw = (max(raw_fitnesses), min(raw_fitnesses)) if self.optim == 'max' else (min(raw_fitnesses), max(raw_fitnesses))
+                history.record(gen + 1, best_raw, sum(raw_fitnesses) / len(raw_fitnesses), worst_raw)
+
             # Apply fitness sharing if enabled
             if fitness_sharing:
                 self.individuals = self.apply_fitness_sharing(new_population)
@@ -7,8 +7,8 @@ This mutation operator randomly selects two positions within each route and swap
 It is a simple and effective mutation method that introduces diversity by rearranging the order of cities in the route.
 '''
 def random_swap_mutation(offspring):
-    # Create a copy of the offspring to avoid modifying the original
-    mutated_offspring = offspring.copy()
+    # Every route is touched, so every route is copied (a shallow copy would share the parent's routes)
+    mutated_offspring = [route[:] for route in offspring]
     # Iterate over each route in the offspring
     for i, route in enumerate(mutated_offspring):
         # Select two random indices within the route
@@ -24,8 +24,8 @@ The shuffle mutation randomly shuffles the order of cities within each route.
 It is similar to random swap mutation but may result in different permutations within the same route.
 '''
 def shuffle_mutation(offspring):
-    # Create a copy of the offspring to avoid modifying the original
-    mutated_offspring = offspring.copy()
+    # Every route is touched, so every route is copied (a shallow copy would share the parent's routes)
+    mutated_offspring = [route[:] for route in offspring]
     # Shuffle each route in the offspring
     for i, route in enumerate(mutated_offspring):
         shuffle(route)
@@ -38,12 +38,14 @@ In route swap mutation, two random routes are selected, and two random cities, o
 This mutation method can explore different combinations of routes in the population.
 '''
 def route_swap_mutation(offspring):
-    # Create a copy of the offspring to avoid modifying the original
-    mutated_offspring = [route.copy() for route in offspring]
+    # Shallow copy of the outer list; routes are only copied once they are actually changed
+    mutated_offspring = list(offspring)
+    copied = set()
 
     # Iterate over each route
-    for i, route1 in enumerate(mutated_offspring):
-        
+    for i in range(len(mutated_offspring)):
+        route1 = mutated_offspring[i]
+
         # Select a random route to swap with
         route_idx2 = randint(0, len(offspring) - 1)
         route2 = mutated_offspring[route_idx2]
@@ -54,6 +56,9 @@ def route_swap_mutation(offspring):
 
         # Ensure selected cities are not already present in the other route
         if city1 not in route2 and city2 not in route1:
+            # Copy-on-write: take private copies of both routes before swapping
+            _own_route(mutated_offspring, i, copied)
+            _own_route(mutated_offspring, route_idx2, copied)
             # Swap the cities between the routes
             mutated_offspring[i][city_idx1] = city2
             mutated_offspring[route_idx2][city_idx2] = city1
@@ -68,17 +73,18 @@ It can disrupt the order of cities within a route, potentially leading to new an
 
 '''
 def scramble_mutation(individual, mutation_rate=0.1):
-    # Create a copy of the individual to avoid mutating the original
-    mutated_individual = [sublist[:] for sublist in individual]
+    # Shallow copy of the outer list; sublists are only copied when they are mutated
+    mutated_individual = list(individual)
 
      # Loop over each sublist
-    for sublist in mutated_individual:
+    for i, sublist in enumerate(mutated_individual):
         # Check if a mutation should occur based on the mutation rate
         if random.random() < mutation_rate:
             # Select a random start and end position for scrambling
             start = random.randint(0, len(sublist) - 1)
             end = random.randint(start, len(sublist) - 1)
-            # Scramble the sublist within the selected range
+            # Copy-on-write, then scramble the sublist within the selected range
+            sublist = mutated_individual[i] = sublist[:]
             sublist[start:end + 1] = random.sample(sublist[start:end + 1], len(sublist[start:end + 1]))
 
     return mutated_individual
@@ -89,17 +95,27 @@ Insertion mutation selects two random positions within each sublist and moves th
 It is another method to introduce small changes in the order of elements within each sublist.
 '''
 def insertion_mutation(individual, mutation_rate=0.1):
-    # Create a copy of the individual to avoid mutating the original
-    mutated_individual = [sublist[:] for sublist in individual]
+    # Shallow copy of the outer list; sublists are only copied when they are mutated
+    mutated_individual = list(individual)
 
     # Loop over each sublist
-    for sublist in mutated_individual:
+    for i, sublist in enumerate(mutated_individual):
         if random.random() < mutation_rate:
             # Select two random positions for insertion
             pos1 = random.randint(0, len(sublist) - 1)
             pos2 = random.randint(0, len(sublist) - 1)
-             # Remove an element from pos1 and insert it into pos2
+            if pos1 == pos2:
+                continue # Nothing moves, so there is nothing to copy
+            # Copy-on-write, then remove an element from pos1 and insert it into pos2
+            sublist = mutated_individual[i] = sublist[:]
             item = sublist.pop(pos1)
             sublist.insert(pos2, item)
 
     return mutated_individual
+
+
+# Copy-on-write helper
+def _own_route(offspring, idx, copied): # Replaces offspring[idx] with a private copy the first time it is written to.
+    if idx not in copied:
+        offspring[idx] = offspring[idx][:]
+        copied.add(idx)
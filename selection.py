@@ -76,4 +76,21 @@ def rank_selection(population):
     for individual, probability in zip(ranked_population, rank_probabilities):
         position += probability
         if position > r:
-            return individual
\ No newline at end of file
+            return individual
+
+## Crowded tournament selection (NSGA-II)
+
+def crowded_tournament_sel(population, tour_size = 2):
+    """Crowded tournament selection for multi-objective populations.
+
+    The individual in the best front wins; ties are broken by the larger crowding distance.
+    Requires the 'rank' and 'crowding' attributes set by Population.assign_rank_crowding.
+
+    Args:
+        population (Population): The population we want to select from.
+
+    Returns:
+        Individual: selected individual.
+    """
+    tournament = [choice(population) for _ in range(tour_size)]
+    return min(tournament, key=lambda individual: (individual.rank, -individual.crowding))